@@ -5,18 +5,30 @@ Optimized for Railway.app deployment with strict target filtering and state pers
 """
 import os
 import re
+import math
+import html
+import hashlib
 import time
 import logging
 import argparse
 import requests
-import feedparser
+from urllib3.util.retry import Retry
 import sqlite3
+import atexit
 import signal
 import sys
-from bs4 import BeautifulSoup
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import heapq
 from datetime import datetime, timezone, timedelta
 import yfinance as yf
 import urllib.parse
+from functools import lru_cache
+from contextlib import contextmanager
+import email.utils
+from io import BytesIO
+import lxml.etree as ET
+import lxml.html
 
 # === CONFIGURATION ===
 BOT_TOKEN = os.getenv("BOT_TOKEN", "")
@@ -25,14 +37,21 @@ CHAT_ID = os.getenv("CHAT_ID", "")
 ENV_TEST_DATE = os.getenv("TEST_DATE")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 DATABASE = os.getenv("DATABASE", "ma_monitor.db")
+# SEC asks automated clients to identify themselves, ideally with a contact address
+USER_AGENT = os.getenv("USER_AGENT", "M&A Monitor Bot")
+POLL_INTERVAL = 60  # seconds between poll starts of a busy feed
+# Quiet feeds back off up to this. Trade-off: the first entry after a quiet spell can be picked
+# up this late, so time-critical feeds set a lower per-feed "max_interval" in FEEDS.
+MAX_POLL_INTERVAL = 900
+SEC_MAX_POLL_INTERVAL = 180  # new filings surface within 3 min; idle SEC polls are cheap 304s
 
 # Feeds to monitor
 FEEDS = [
-    {"name": "SEC 8-K",        "url": "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=8-K&output=atom"},
-    {"name": "SEC S-4",        "url": "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=S-4&output=atom"},
-    {"name": "SEC SC TO-C",    "url": "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=SC+TO-C&output=atom"},
-    {"name": "SEC SC 13D",     "url": "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=SC+13D&output=atom"},
-    {"name": "SEC DEFM14A",    "url": "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=DEFM14A&output=atom"},
+    {"name": "SEC 8-K",        "url": "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=8-K&output=atom", "max_interval": SEC_MAX_POLL_INTERVAL},
+    {"name": "SEC S-4",        "url": "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=S-4&output=atom", "max_interval": SEC_MAX_POLL_INTERVAL},
+    {"name": "SEC SC TO-C",    "url": "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=SC+TO-C&output=atom", "max_interval": SEC_MAX_POLL_INTERVAL},
+    {"name": "SEC SC 13D",     "url": "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=SC+13D&output=atom", "max_interval": SEC_MAX_POLL_INTERVAL},
+    {"name": "SEC DEFM14A",    "url": "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=DEFM14A&output=atom", "max_interval": SEC_MAX_POLL_INTERVAL},
     {"name": "PR Newswire M&A", "url": "https://www.prnewswire.com/rss/Acquisitions-Mergers-and-Takeovers-list.rss"}
 ]
 
@@ -68,196 +87,409 @@ PATTERN_BY = re.compile(
     re.IGNORECASE
 )
 
-# Positive/negative filters
-POSITIVE_PATTERNS = [
-    re.compile(r"\b(announces|intends to|agrees to|enters into).{0,20}?(acquisition|merger|acqui(re|sition|ring)|buyout|takeover|tender offer|exchange offer|definitive agreement)\b", re.IGNORECASE),
-    re.compile(r"\bproposed (acquisition|merger)\b", re.IGNORECASE),
-    re.compile(r"\b(annonce|entend).{0,20}?(acquisition|fusion)\b", re.IGNORECASE),
-    re.compile(r"\b(aankondigt|voornemens om).{0,20}?(overname|fusie)\b", re.IGNORECASE)
-]
-NEGATIVE_PATTERNS = [
-    re.compile(r"\b(completed|closing|closed|finalized|concluded|settled)\b", re.IGNORECASE),
-    re.compile(r"\b(talent|data|customer|inventory|brand|division|portfolio|asset|property) acquisition\b", re.IGNORECASE),
-    re.compile(r"\bsince [0-9]{4}\b", re.IGNORECASE),
-    re.compile(r"\bover the past\b", re.IGNORECASE),
-    re.compile(r"\b(product launch|event|partnership|sponsorship|joint venture)\b", re.IGNORECASE)
-]
+# Positive/negative filters (one alternation each, so a single search per entry).
+# Patterns are lowercase and matched case-sensitively against lowercased text,
+# which is cheaper than re.IGNORECASE.
+POSITIVE_RE = re.compile(
+    r"\b(?:(?:announces|intends to|agrees to|enters into).{0,20}?(?:acquisition|merger|acqui(?:re|sition|ring)|buyout|takeover|tender offer|exchange offer|definitive agreement)"
+    r"|proposed (?:acquisition|merger)"
+    r"|(?:annonce|entend).{0,20}?(?:acquisition|fusion)"
+    r"|(?:aankondigt|voornemens om).{0,20}?(?:overname|fusie))\b"
+)
+# Every POSITIVE_RE branch starts with one of these words; used as a substring pre-filter
+POSITIVE_LEAD_WORDS = ('announces', 'intends', 'agrees', 'enters', 'proposed', 'annonce', 'entend', 'aankondigt', 'voornemens')
+NEGATIVE_RE = re.compile(
+    r"\b(?:completed|closing|closed|finalized|concluded|settled"
+    r"|(?:talent|data|customer|inventory|brand|division|portfolio|asset|property) acquisition"
+    r"|since [0-9]{4}"
+    r"|over the past"
+    r"|product launch|event|partnership|sponsorship|joint venture)\b"
+)
+
+# A target must look like a company name to be worth a ticker lookup
+COMPANY_SUFFIXES = ('inc.', 'corp.', 'ltd.', 'plc', 'llc', 'corporation')
 
 # Ticker regex
-TICKER_REGEX = re.compile(
-    r"(?:NYSE|NASDAQ|AMEX|OTC(?:QB|QX)?|TSX(?:V)?|NEO):?\s*([A-Z]{1,5}(?:\.[A-Z]{1,2})?)\b",
-    re.IGNORECASE
+EXCHANGE_TICKER = r"(?:NYSE|NASDAQ|AMEX|OTC(?:QB|QX)?|TSX(?:V)?|NEO):?\s*(?P<ticker>[A-Z]{1,5}(?:\.[A-Z]{1,2})?)"
+TICKER_REGEX = re.compile(EXCHANGE_TICKER + r"\b", re.IGNORECASE)
+
+# Offer price regex ("for $X", "at $X", "per share $X", "consideration of $X" or a bare "$X")
+PRICE_RE = re.compile(
+    r"(?:(?:for|at|per share|consideration of)\s*)?\$\s*([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{1,2})?)"
 )
 
+# Shared HTTP session so Telegram/Yahoo/SEC calls reuse keep-alive connections
+SESSION = requests.Session()
+# transient errors are retried with backoff; POST is not retried, so Telegram never gets duplicates
+SESSION.mount('https://', requests.adapters.HTTPAdapter(
+    pool_connections=8, pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504])
+))
+
 # Caches and state
 _equity_cache = {}
-t_sent_links = set()
+_quote_cache = {}   # ticker -> (fetched_at, (is_equity, price))
+_name_cache = {}    # company name -> (fetched_at, ticker)
+PRICE_CACHE_TTL = 300
+NAME_CACHE_TTL = 3600
+CACHE_MAXSIZE = 1024
+t_sent_links = set()          # hash(link) of recently alerted links; sent_links table is authoritative
+_sent_order = deque()         # same hashes in insertion order, for FIFO eviction
+SENT_LINKS_MAX = 4096
+SENT_LINKS_RETENTION_DAYS = 30
 latest_dates = {}
+_entry_failures = {}          # link -> failed process_entry attempts, while it awaits retry
+ENTRY_MAX_ATTEMPTS = 3
+
+# --- Sent-link Bloom filter ---
+# Answers "definitely not sent" without touching SQLite; a "maybe" is confirmed by is_sent_link
+class BloomFilter:
+    def __init__(self, capacity=100000, error_rate=0.001):
+        self.size = int(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        d = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(d[:8], 'little'), int.from_bytes(d[8:], 'little')
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+_sent_bloom = BloomFilter()
 
 # --- Database functions ---
+# One connection for the process lifetime (autocommit, WAL). All DB access happens on the
+# main thread; the feed pool threads only download and parse.
+_db = None
+
+def get_db():
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(DATABASE, isolation_level=None)
+        _db.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA temp_store=MEMORY;")
+        atexit.register(_db.close)
+    return _db
+
+# Group several writes into one transaction. Always commits: rows written before an error
+# (queued alerts, advanced cutoffs, sent links of delivered alerts) are still correct and
+# must not be re-done.
+@contextmanager
+def db_batch():
+    db = get_db()
+    db.execute("BEGIN")
+    try:
+        yield db
+    finally:
+        db.execute("COMMIT")
+
 def init_db():
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    c.execute("CREATE TABLE IF NOT EXISTS sent_links (link TEXT PRIMARY KEY)")
+    c = get_db()
+    c.execute("CREATE TABLE IF NOT EXISTS sent_links (link TEXT PRIMARY KEY, ts INTEGER)")
     c.execute("CREATE TABLE IF NOT EXISTS latest_dates (feed_name TEXT PRIMARY KEY, date TEXT)")
-    conn.commit()
-    conn.close()
+    c.execute("CREATE TABLE IF NOT EXISTS feed_validators (url TEXT PRIMARY KEY, etag TEXT, modified TEXT)")
+    c.execute("CREATE TABLE IF NOT EXISTS pending_alerts (link TEXT PRIMARY KEY, text TEXT, ts INTEGER)")
+    # databases created before the ts column existed
+    if 'ts' not in {row[1] for row in c.execute("PRAGMA table_info(sent_links)")}:
+        c.execute("ALTER TABLE sent_links ADD COLUMN ts INTEGER")
+    c.execute("UPDATE sent_links SET ts=? WHERE ts IS NULL", (int(time.time()),))
+
+def load_sent_links(limit):
+    rows = get_db().execute("SELECT link FROM sent_links ORDER BY rowid DESC LIMIT ?", (limit,)).fetchall()
+    return [row[0] for row in rows][::-1]
+
+def iter_sent_links():
+    for row in get_db().execute("SELECT link FROM sent_links"):
+        yield row[0]
 
-def load_sent_links():
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    c.execute("SELECT link FROM sent_links")
-    links = {row[0] for row in c.fetchall()}
-    conn.close()
-    return links
+def is_sent_link(link):
+    return get_db().execute("SELECT 1 FROM sent_links WHERE link=?", (link,)).fetchone() is not None
 
 def save_sent_link(link):
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    c.execute("INSERT OR IGNORE INTO sent_links VALUES (?)", (link,))
-    conn.commit()
-    conn.close()
+    get_db().execute("INSERT OR IGNORE INTO sent_links VALUES (?, ?)", (link, int(time.time())))
+
+def prune_sent_links(max_age_days=SENT_LINKS_RETENTION_DAYS):
+    get_db().execute("DELETE FROM sent_links WHERE ts < ?", (int(time.time()) - max_age_days*86400,))
 
 def load_latest_dates():
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    c.execute("SELECT feed_name, date FROM latest_dates")
-    rows = c.fetchall()
-    conn.close()
+    rows = get_db().execute("SELECT feed_name, date FROM latest_dates").fetchall()
     return {row[0]: datetime.fromisoformat(row[1]) for row in rows}
 
 def save_latest_date(feed_name, dt):
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    c.execute("INSERT OR REPLACE INTO latest_dates VALUES (?, ?)", (feed_name, dt.isoformat()))
-    conn.commit()
-    conn.close()
+    get_db().execute("INSERT OR REPLACE INTO latest_dates VALUES (?, ?)", (feed_name, dt.isoformat()))
+
+def load_feed_validators():
+    rows = get_db().execute("SELECT url, etag, modified FROM feed_validators").fetchall()
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+def save_feed_validators(url, etag, modified):
+    get_db().execute("INSERT OR REPLACE INTO feed_validators VALUES (?, ?, ?)", (url, etag, modified))
+
+# Alerts queued but not yet accepted by Telegram; written in the same transaction as the
+# feed cutoff that skips their entries, so a restart resends them instead of losing them
+def load_pending_alerts():
+    return get_db().execute("SELECT link, text, ts FROM pending_alerts ORDER BY rowid").fetchall()
+
+def save_pending_alert(link, text, ts):
+    get_db().execute("INSERT OR REPLACE INTO pending_alerts VALUES (?, ?, ?)", (link, text, ts))
+
+def delete_pending_alert(link):
+    get_db().execute("DELETE FROM pending_alerts WHERE link=?", (link,))
 
 # --- Utility functions ---
+def cache_get(cache, key, ttl):
+    hit = cache.get(key)
+    if hit and time.monotonic() - hit[0] < ttl:
+        return True, hit[1]
+    return False, None
+
+def cache_put(cache, key, value):
+    if len(cache) >= CACHE_MAXSIZE:
+        cache.pop(next(iter(cache)))
+    cache[key] = (time.monotonic(), value)
+    return value
+
+_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+# Visible text of an HTML document/fragment (script/style dropped), extracted in C by lxml
+def html_to_text(markup):
+    try:
+        doc = lxml.html.document_fromstring(markup.encode('utf-8'), parser=_HTML_PARSER)
+    except ET.ParserError:   # empty or comment-only input
+        return ''
+    ET.strip_elements(doc, 'script', 'style', with_tail=False)
+    return doc.text_content()
+
+# Same character set the old re.sub class matched ('+-=' there was the range '+' .. '=')
+_MD_ESCAPE = str.maketrans({c: '\\' + c for c in '\\*_[]()~`>#|{}.!' + ''.join(map(chr, range(ord('+'), ord('=') + 1)))})
+
 def escape_md(text):
-    return re.sub(r'([\\*_\[\]()~`>#+-=|{}\.!])', r'\\\1', text)
+    return text.translate(_MD_ESCAPE)
 
 # --- Telegram notifier ---
+TELEGRAM_MAX_LEN = 4096
+TELEGRAM_RETRY_DELAY = 15       # first retry of a rejected batch, doubling up to TELEGRAM_RETRY_MAX_DELAY
+TELEGRAM_RETRY_MAX_DELAY = 300
+TELEGRAM_RETRY_WINDOW = 3600    # alerts still undelivered this long after queueing are dropped
+_pending_msgs = []  # (text, link, queued_at, failed sends, next attempt), mirrored in pending_alerts
+
 def send_telegram_message(text):
     check_credentials()
     escaped = escape_md(text)
     url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
     payload = {"chat_id": CHAT_ID, "text": escaped, "parse_mode": "MarkdownV2"}
     try:
-        resp = requests.post(url, json=payload, timeout=15)
+        resp = SESSION.post(url, json=payload, timeout=15)
         resp.raise_for_status()
         logger.debug("Telegram message sent")
+        return True
     except Exception as e:
         logger.error(f"Telegram error: {e}")
+        return False
+
+# The link is only stored as sent once Telegram accepts the alert
+def queue_telegram_message(text, link):
+    now = time.time()
+    _pending_msgs.append((text, link, now, 0, now))
+    save_pending_alert(link, text, int(now))
+
+# Send due alerts packed into as few messages as Telegram's length limit allows.
+# A rejected batch is retried with exponential backoff until TELEGRAM_RETRY_WINDOW has passed.
+def flush_telegram_messages():
+    now = time.time()
+    keep = [m for m in _pending_msgs if m[4] > now]
+    batches, batch = [], []
+    for item in _pending_msgs:
+        if item[4] > now:
+            continue
+        if batch and len(escape_md("\n\n".join([m[0] for m in batch] + [item[0]]))) > TELEGRAM_MAX_LEN:
+            batches.append(batch)
+            batch = []
+        batch.append(item)
+    if batch:
+        batches.append(batch)
+    for batch in batches:
+        sent = send_telegram_message("\n\n".join(m[0] for m in batch))
+        with db_batch():
+            for text, link, queued_at, fails, _ in batch:
+                if sent:
+                    _sent_bloom.add(link); save_sent_link(link); delete_pending_alert(link)
+                elif now - queued_at >= TELEGRAM_RETRY_WINDOW:
+                    logger.error(f"Dropping alert undelivered for {TELEGRAM_RETRY_WINDOW//60} min: {link}")
+                    delete_pending_alert(link)
+                else:
+                    delay = min(TELEGRAM_RETRY_DELAY * 2**fails, TELEGRAM_RETRY_MAX_DELAY)
+                    keep.append((text, link, queued_at, fails + 1, now + delay))
+    _pending_msgs[:] = keep
 
 # --- Market data & extraction ---
+# One yfinance .info fetch per ticker per TTL, shared by is_listed_equity and get_market_price
+def yf_quote(ticker):
+    hit, quote = cache_get(_quote_cache, ticker, PRICE_CACHE_TTL)
+    if hit:
+        return quote
+    info = yf.Ticker(ticker, session=SESSION).info
+    price = info.get("regularMarketPrice") or info.get("previousClose") or info.get("currentPrice")
+    return cache_put(_quote_cache, ticker, (info.get("quoteType") == "EQUITY", price))
+
 def get_market_price(ticker):
-    stock = yf.Ticker(ticker)
-    info = stock.info
-    return info.get("regularMarketPrice") or info.get("previousClose") or info.get("currentPrice")
+    return yf_quote(ticker)[1]
 
 
 def extract_offer_price(text):
-    for pat in [
-        r"\$\s*([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{1,2})?)",
-        r"for\s*\$\s*([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{1,2})?)",
-        r"at\s*\$\s*([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{1,2})?)",
-        r"per share\s*\$\s*([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{1,2})?)",
-        r"consideration of\s*\$\s*([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{1,2})?)"
-    ]:
-        m = re.search(pat, text)
-        if m:
-            try:
-                return float(m.group(1).replace(',', ''))
-            except ValueError:
-                continue
-    return None
+    m = PRICE_RE.search(text)
+    return float(m.group(1).replace(',', '')) if m else None
+
+# PRICE_RE needs a dollar sign, literal or as an entity; pages without one are not worth parsing
+# (Word/EDGARizer exports zero-pad numeric references, e.g. &#036; or &#x0024;)
+DOLLAR_RE = re.compile(rb'\$|&#0*36;|&#[xX]0*24;|&dollar;')
+# Offer terms sit near the top of a filing; the rest of a multi-MB exhibit is never needed
+FILING_MAX_BYTES = 512 * 1024
 
 def fetch_full_text(url):
-    r = requests.get(url, headers={'User-Agent': 'M&A Monitor Bot'}, timeout=20)
-    r.raise_for_status()
-    return BeautifulSoup(r.text, 'html.parser').get_text()
+    with SESSION.get(url, headers={'User-Agent': USER_AGENT}, timeout=20, stream=True) as r:
+        r.raise_for_status()
+        # requests defaults text/* without a charset to ISO-8859-1; only trust a declared one
+        declared = 'charset' in r.headers.get('Content-Type', '').lower()
+        encoding = r.encoding if declared else None
+        body = bytearray()
+        for chunk in r.iter_content(chunk_size=65536):
+            body += chunk
+            if len(body) >= FILING_MAX_BYTES:
+                break
+    if not DOLLAR_RE.search(body):
+        return ''
+    if not encoding:
+        # sniff like r.apparent_encoding would (it can't be used after a partial streamed read)
+        encoding = requests.compat.chardet.detect(bytes(body))['encoding']
+    try:
+        markup = body.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:     # unknown charset label
+        markup = body.decode('utf-8', errors='replace')
+    return html_to_text(markup)
 
 
 def lookup_ticker_by_name(name):
+    hit, ticker = cache_get(_name_cache, name, NAME_CACHE_TTL)
+    if hit:
+        return ticker
     q = urllib.parse.quote(name)
-    r = requests.get(f"https://query2.finance.yahoo.com/v1/finance/search?q={q}", timeout=15)
+    r = SESSION.get(f"https://query2.finance.yahoo.com/v1/finance/search?q={q}&newsCount=0", timeout=15)
     r.raise_for_status()
     for item in r.json().get("quotes", []):
         if item.get("quoteType") == "EQUITY":
-            return item.get("symbol").replace('.', '-')
-    return None
+            return cache_put(_name_cache, name, item.get("symbol").replace('.', '-'))
+    # cache misses too so unknown names are not re-queried every poll
+    return cache_put(_name_cache, name, None)
 
 def is_listed_equity(ticker):
     if ticker in _equity_cache:
         return _equity_cache[ticker]
-    info = yf.Ticker(ticker).info
-    eq = info.get("quoteType") == "EQUITY"
-    _equity_cache[ticker] = eq
+    eq = _equity_cache[ticker] = yf_quote(ticker)[0]
     return eq
 
+# "<target name> ... (NYSE: XYZ)"; compiled once per distinct target name
+@lru_cache(maxsize=256)
+def target_ticker_regex(target_name):
+    return re.compile(rf"{re.escape(target_name)}.*?\({EXCHANGE_TICKER}\)", re.IGNORECASE)
+
 def extract_target_ticker(target_name, title, content):
-    pat = re.compile(
-        rf"{re.escape(target_name)}.*?\((?:NYSE|NASDAQ|AMEX|OTC(?:QB|QX)?|TSX(?:V)?|NEO):?\s*([A-Z]{{1,5}}(?:\.[A-Z]{{1,2}})?)\)",
-        re.IGNORECASE
-    )
+    pat = target_ticker_regex(target_name)
     for text in (title, content):
         m = pat.search(text)
         if m:
-            t = m.group(1).upper().replace('.', '-')
+            t = m.group('ticker').upper().replace('.', '-')
             if is_listed_equity(t): return t
     m2 = TICKER_REGEX.search(content)
-    if m2 and is_listed_equity(m2.group(1).upper().replace('.', '-')):
-        return m2.group(1).upper().replace('.', '-')
+    if m2:
+        t = m2.group('ticker').upper().replace('.', '-')
+        if is_listed_equity(t): return t
     return lookup_ticker_by_name(target_name)
 
 # --- State initialization ---
+def remember_link(link):
+    h = hash(link)
+    if h in t_sent_links:
+        return
+    t_sent_links.add(h); _sent_order.append(h)
+    if len(_sent_order) > SENT_LINKS_MAX:
+        t_sent_links.discard(_sent_order.popleft())
+
 def init_state():
     init_db()
-    global t_sent_links, latest_dates
-    t_sent_links = load_sent_links()
+    global latest_dates, _sent_bloom
+    t_sent_links.clear(); _sent_order.clear()
+    prune_sent_links()
+    for link in load_sent_links(SENT_LINKS_MAX):
+        remember_link(link)
+    _sent_bloom = BloomFilter()
+    for link in iter_sent_links():
+        _sent_bloom.add(link)
+    _feed_state.update(load_feed_validators())
+    # alerts queued before a restart: resend them, and keep their entries from being queued again
+    _pending_msgs.clear()
+    for link, text, ts in load_pending_alerts():
+        _pending_msgs.append((text, link, ts, 0, 0))
+        remember_link(link)
     saved = load_latest_dates()
     now = datetime.now(timezone.utc)
     latest_dates = {f['name']: saved.get(f['name'], now) for f in FEEDS}
     # persist initial dates
-    for name, dt in latest_dates.items():
-        if name not in saved:
-            save_latest_date(name, dt)
+    with db_batch():
+        for name, dt in latest_dates.items():
+            if name not in saved:
+                save_latest_date(name, dt)
 
 # --- Process single entry ---
 def process_entry(feed_name, entry):
-    link = entry.link
-    # parse date
-    for attr in ('updated_parsed','published_parsed','created_parsed'):
-        if hasattr(entry, attr):
-            pub_date = datetime(*getattr(entry, attr)[:6], tzinfo=timezone.utc)
-            break
-    else:
+    link = entry['link']
+    pub_date = entry['date']
+    if not link or not pub_date:
         return
-    if pub_date <= latest_dates.get(feed_name) or link in t_sent_links:
+    if pub_date <= latest_dates.get(feed_name) or hash(link) in t_sent_links:
         return
-    title = (entry.title or '').strip()
-    raw = entry.content[0].value if hasattr(entry,'content') and entry.content else entry.get('summary','')
-    text = BeautifulSoup(raw,'html.parser').get_text()
+    if link in _sent_bloom and is_sent_link(link):
+        return
+    title = entry['title'].strip()
+    raw = entry['summary']
+    # cheap gate on the raw markup: without any POSITIVE_RE lead word there is nothing to parse
+    raw_lc = f"{title} {raw}".lower()
+    if not any(w in raw_lc for w in POSITIVE_LEAD_WORDS):
+        return
+    # plain-text summaries (no tags) only need entity decoding, not a parser
+    text = html.unescape(raw) if '<' not in raw else html_to_text(raw)
     lc = f"{title}. {text}".lower()
-    if any(p.search(lc) for p in NEGATIVE_PATTERNS):
-        latest_dates[feed_name] = pub_date; save_latest_date(feed_name,pub_date); return
-    if not any(p.search(lc) for p in POSITIVE_PATTERNS):
-        latest_dates[feed_name] = pub_date; save_latest_date(feed_name,pub_date); return
+    if NEGATIVE_RE.search(lc):
+        return
+    if not POSITIVE_RE.search(lc):
+        return
     # direction
+    head = text[:500]
     for pat in (PATTERN_ACQUIRES,PATTERN_BY):
-        m = pat.search(title) or pat.search(text[:500])
+        m = pat.search(title) or pat.search(head)
         if m:
             target = m.group('target').strip()
             acquirer = m.group('acquirer').strip()
             break
     else:
         return
-    if not any(s in target.lower() for s in ['inc.','corp.','ltd.','plc','llc','corporation']): return
+    target_lc = target.lower()
+    if not any(s in target_lc for s in COMPANY_SUFFIXES): return
     ticker = extract_target_ticker(target,title,text)
     if not ticker or not is_listed_equity(ticker): return
-    full = fetch_full_text(link)
-    offer = extract_offer_price(text) or extract_offer_price(full)
+    offer = extract_offer_price(text) or extract_offer_price(title)
+    if not offer:
+        # only pull the full filing when neither the excerpt nor the title has a price;
+        # the offer is optional, so a failed fetch (SEC 403/404) still sends the alert
+        try:
+            offer = extract_offer_price(fetch_full_text(link))
+        except Exception as e:
+            logger.warning(f"Filing fetch failed ({link}): {e}")
     market = get_market_price(ticker)
     msg = [f"📢 *New M&A Alert ({feed_name})!*",
            f"🎯 *Target:* {target} ({ticker})",
@@ -269,9 +501,151 @@ def process_entry(feed_name, entry):
     if offer and market:
         try: msg.append(f"🔥 *Premium:* {(offer-market)/market*100:.1f}%")
         except: pass
-    send_telegram_message("\n".join(msg))
-    t_sent_links.add(link); save_sent_link(link)
-    latest_dates[feed_name]=pub_date; save_latest_date(feed_name,pub_date)
+    # the hot set stops other feeds re-queueing it; bloom + DB are written once it is sent
+    queue_telegram_message("\n".join(msg), link)
+    remember_link(link)
+
+# Process one feed's entries against the cutoff as it stood before the batch, then
+# advance the cutoff once (feeds list newest first, so per-entry updates would skip older new entries).
+# An entry that raises (e.g. a Yahoo hiccup) holds the cutoff just below its date so the next poll
+# retries it; after ENTRY_MAX_ATTEMPTS it is given up, so it can't pin the feed.
+# Returns (cutoff advanced, no entry left to retry). With persist=False the cutoff stays in memory.
+def process_entries(feed_name, entries, persist=True):
+    cutoff = newest = latest_dates[feed_name]
+    retry_below = None
+    with db_batch():
+        for e in entries:
+            try:
+                process_entry(feed_name, e)
+                _entry_failures.pop(e['link'], None)
+            except Exception as ex:
+                fails = _entry_failures.get(e['link'], 0) + 1
+                if e['date'] and fails < ENTRY_MAX_ATTEMPTS:
+                    _entry_failures[e['link']] = fails
+                    logger.warning(f"Entry error ({feed_name}, {e['link']}), will retry: {ex}")
+                    retry_below = e['date'] if retry_below is None else min(retry_below, e['date'])
+                else:
+                    _entry_failures.pop(e['link'], None)
+                    logger.error(f"Entry error ({feed_name}, {e['link']}), giving up after {fails} attempts: {ex}")
+            if e['date'] and e['date'] > newest:
+                newest = e['date']
+        if retry_below is not None:
+            newest = max(cutoff, min(newest, retry_below - timedelta(seconds=1)))
+        if newest > cutoff:
+            latest_dates[feed_name] = newest
+            if persist:
+                save_latest_date(feed_name, newest)
+    return newest > cutoff, retry_below is None
+
+# --- Feed fetching ---
+_feed_pool = ThreadPoolExecutor(max_workers=len(FEEDS))
+_feed_state = {}    # url -> (ETag, Last-Modified) of the last processed 200 response
+_feed_digests = {}  # url -> blake2b digest of the last processed 200 body
+
+# Feeds re-list the same entries every poll, so the raw date strings repeat
+@lru_cache(maxsize=5000)
+def parse_feed_date(value):
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))   # Atom <updated>/<published>
+    except ValueError:
+        try:
+            dt = email.utils.parsedate_to_datetime(value)            # RSS <pubDate>
+        except (TypeError, ValueError):
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).replace(microsecond=0)
+
+def entry_link(elem):
+    # Atom: <link rel="alternate" href="..."/>, RSS: <link>url</link>
+    for l in elem.iterfind('{*}link'):
+        if l.get('href') and l.get('rel', 'alternate') == 'alternate':
+            return l.get('href')
+        if l.text and l.text.strip():
+            return l.text.strip()
+    return None
+
+# Minimal RSS/Atom parser: only the fields process_entry uses, one <item>/<entry> at a time
+def parse_feed(body):
+    entries = []
+    for _, elem in ET.iterparse(BytesIO(body), tag=('{*}item', '{*}entry'), recover=True):
+        entries.append({
+            'title': elem.findtext('{*}title') or '',
+            'link': entry_link(elem),
+            'date': parse_feed_date(elem.findtext('{*}updated') or elem.findtext('{*}published') or elem.findtext('{*}pubDate')),
+            'summary': elem.findtext('{*}content') or elem.findtext('{*}encoded') or elem.findtext('{*}summary') or elem.findtext('{*}description') or '',
+        })
+        elem.clear()
+        # drop already-read siblings too, so memory stays flat however long the feed is
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    return entries
+
+# Returns (entries, validators); validators is (ETag, Last-Modified, body digest) of a 200 response, else None.
+# A 200 whose body is byte-identical to the last processed one is treated like a 304
+# (for hosts that ignore conditional headers). With conditional=False the cached
+# validators and digests are ignored (test mode rewinds the cutoffs).
+def fetch_feed(feed, conditional=True):
+    url = feed['url']
+    headers = {'User-Agent': USER_AGENT}
+    etag, modified = _feed_state.get(url, (None, None)) if conditional else (None, None)
+    if etag: headers['If-None-Match'] = etag
+    if modified: headers['If-Modified-Since'] = modified
+    try:
+        r = SESSION.get(url, headers=headers, timeout=20)
+        if r.status_code == 304:
+            return [], None
+        r.raise_for_status()
+        digest = hashlib.blake2b(r.content, digest_size=16).digest()
+        if conditional and digest == _feed_digests.get(url):
+            return [], None
+        return parse_feed(r.content), (r.headers.get('ETag'), r.headers.get('Last-Modified'), digest)
+    except Exception as e:
+        logger.warning(f"Feed error ({feed['name']}): {e}")
+        return [], None
+
+# Per-feed poll interval: half the smoothed gap between polls that brought new entries,
+# clamped to [POLL_INTERVAL, feed's max_interval or MAX_POLL_INTERVAL]; a feed gone quiet
+# backs off, a burst speeds it up
+_arrivals = {}      # feed name -> (monotonic time of last new entries, EWMA of gaps)
+
+def note_arrival(feed):
+    now = time.monotonic()
+    last, ewma = _arrivals.get(feed['name'], (None, POLL_INTERVAL))
+    if last is not None and now - last <= feed.get('max_interval', MAX_POLL_INTERVAL):
+        ewma = 0.3*(now - last) + 0.7*ewma
+    else:
+        ewma = POLL_INTERVAL    # first entries after a quiet spell: poll at full speed again
+    _arrivals[feed['name']] = (now, ewma)
+
+def poll_interval(feed):
+    last, ewma = _arrivals.get(feed['name'], (None, None))
+    if last is None:
+        return POLL_INTERVAL
+    gap = max(ewma, time.monotonic() - last)
+    return min(max(gap*0.5, POLL_INTERVAL), feed.get('max_interval', MAX_POLL_INTERVAL))
+
+# Validators and digests are only remembered once their entries are processed, so a crash
+# or error mid-batch makes the next poll re-download and re-parse the feed instead of skipping it.
+# persist=False (test mode) leaves cutoffs, validators and digests of the live monitor untouched.
+def handle_feed(feed, result, persist=True):
+    entries, validators = result
+    advanced, complete = process_entries(feed['name'], entries, persist)
+    if advanced and persist:
+        note_arrival(feed)
+    # keep the old validators while an entry awaits retry, so the next poll isn't a 304
+    if validators and persist and complete:
+        etag, modified, digest = validators
+        _feed_state[feed['url']] = (etag, modified)
+        _feed_digests[feed['url']] = digest
+        save_feed_validators(feed['url'], etag, modified)
+
+# Download and parse all feeds in parallel (unconditionally); yields (feed, result) pairs in FEEDS order
+def fetch_feeds():
+    return zip(FEEDS, _feed_pool.map(lambda f: fetch_feed(f, conditional=False), FEEDS))
 
 # --- Test mode ---
 def test_for_date(date_str):
@@ -281,22 +655,53 @@ def test_for_date(date_str):
         logger.error('Invalid test date format')
         return
     for k in latest_dates: latest_dates[k]=dt - timedelta(seconds=1)
-    for feed in FEEDS:
-        data=feedparser.parse(feed['url'])
-        for e in data.entries: process_entry(feed['name'],e)
+    for feed,result in fetch_feeds():
+        handle_feed(feed,result,persist=False)
+    flush_telegram_messages()
 
 # --- Monitor loop ---
+# Each feed has its own tick (min-heap keyed by next run time, see poll_interval), so a slow
+# feed never delays the others; a tick is skipped while that feed's last fetch is in flight.
 def run_monitor():
     init_state(); check_credentials()
     send_telegram_message("🟢 *M&A Monitor started*: Watching SEC & PR Newswire 🚀")
-    backoff=60
+    backoff=POLL_INTERVAL
+    last_prune=last_flush=time.monotonic()
+    # _arrivals isn't persisted: count startup as the last arrival, so a feed that stays
+    # quiet after a restart backs off like any other quiet feed instead of polling every minute
+    for f in FEEDS:
+        _arrivals.setdefault(f['name'], (last_prune, POLL_INTERVAL))
+    schedule=[(last_prune, i) for i in range(len(FEEDS))]
+    in_flight={}    # future -> FEEDS index
     while True:
         try:
-            for f in FEEDS:
-                data=feedparser.parse(f['url'])
-                for e in data.entries: process_entry(f['name'],e)
-            backoff=60
-            time.sleep(backoff)
+            now=time.monotonic()
+            if now-last_prune > 86400:
+                prune_sent_links(); last_prune=now
+            while schedule[0][0] <= now:
+                due,i=heapq.heappop(schedule)
+                if i not in in_flight.values():
+                    in_flight[_feed_pool.submit(fetch_feed, FEEDS[i])]=i
+                interval=poll_interval(FEEDS[i])
+                nxt=due+interval
+                heapq.heappush(schedule, (nxt if nxt > now else now+interval, i))
+            timeout=max(0, schedule[0][0]-time.monotonic())
+            if not in_flight:
+                time.sleep(timeout); continue
+            done,_=wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            try:
+                for fut in done:
+                    feed=FEEDS[in_flight.pop(fut)]
+                    handle_feed(feed,fut.result())
+            except BaseException:
+                # also on errors and SIGTERM (sys.exit); unsent alerts stay in pending_alerts anyway
+                flush_telegram_messages(); last_flush=time.monotonic()
+                raise
+            # once per scheduler pass: when its last fetch has landed (feeds due together
+            # finish together), or after POLL_INTERVAL if fetches keep overlapping
+            if not in_flight or time.monotonic()-last_flush >= POLL_INTERVAL:
+                flush_telegram_messages(); last_flush=time.monotonic()
+            backoff=POLL_INTERVAL
         except Exception as e:
             logger.critical(f"Fatal: {e}")
             backoff=min(backoff*2,300)